@@ -1,6 +1,6 @@
+import itertools
 import os
 import json
-import uuid
 from typing import List
 
 from agents import Agent, ModelSettings, WebSearchTool
@@ -8,14 +8,19 @@ from agents import function_tool
 from pydantic import BaseModel
 
 from agent_models import AgentSummaryOutput
+from observability import RUN_ID
 
 # ---------------------------------------------------------------------------
 # Observability hooks (set from main.py)
 # ---------------------------------------------------------------------------
 EVENT_LOG_PATH = ""
 
+# Op ids only have to be unique within a run, so a counter scoped to the
+# run_id does the job without a urandom read + uuid format per tool call.
+_OP_COUNTER = itertools.count(1)
+
 def _new_op_id() -> str:
-    return str(uuid.uuid4())
+    return f"{RUN_ID[:8]}-{next(_OP_COUNTER):08x}"
 
 def set_event_log_path(path: str) -> None:
     global EVENT_LOG_PATH
@@ -92,8 +97,10 @@ def write_local_json(path: str, payload: AgentSummaryOutput) -> str:
 
     try:
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(payload.model_dump(), f, indent=2)
+        # model_dump_json serializes in pydantic-core without building an
+        # intermediate Python dict first.
+        with open(path, "wb") as f:
+            f.write(payload.model_dump_json(indent=2).encode("utf-8"))
 
         _log(
             "tool_completed",
@@ -1,20 +1,32 @@
 # 00_03_e/inventory_io.py
+import functools
 import os
 import json
 from agent_models import AgentInventory
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 def inventory_exists(path: str) -> bool:
     return os.path.exists(path)
 
-def load_inventory(path: str) -> AgentInventory:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+@functools.lru_cache(maxsize=8)
+def _load_inventory_cached(path: str, mtime: float) -> AgentInventory:
+    # mtime is only part of the key: a changed file gets a fresh parse,
+    # an unchanged one skips JSON parsing and pydantic validation.
+    with open(path, "rb") as f:
+        data = orjson.loads(f.read()) if orjson is not None else json.load(f)
     return AgentInventory(**data)
 
+def load_inventory(path: str) -> AgentInventory:
+    return _load_inventory_cached(path, os.path.getmtime(path))
+
 def save_inventory(path: str, inventory: AgentInventory) -> None:
     ensure_dir(os.path.dirname(path) or ".")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(inventory.model_dump(), f, indent=2)
+    with open(path, "wb") as f:
+        f.write(inventory.model_dump_json(indent=2).encode("utf-8"))
@@ -7,7 +7,7 @@ Goal:
 - Produce a small, human-readable impact summary + a structured diff report.
 
 Prereqs:
-  pip install deepdiff
+  pip install deepdiff   (only needed for --deep / --ignore-order)
   python assess_failure_impact.py --snapshots 00_03_e/snapshot --current 00_03_e/out/shopping_summary.json
 
 Notes:
@@ -19,9 +19,12 @@ Notes:
 import argparse
 import json
 import os
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from deepdiff import DeepDiff
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # -----------------------------
@@ -38,24 +41,73 @@ def find_latest_snapshot(snapshots_dir: str) -> str:
     if not os.path.isdir(snapshots_dir):
         raise FileNotFoundError(f"Snapshot directory not found: {snapshots_dir}")
 
-    candidates = []
-    for name in os.listdir(snapshots_dir):
-        if name.lower().endswith(".json"):
-            full = os.path.join(snapshots_dir, name)
-            if os.path.isfile(full):
-                candidates.append(full)
+    # scandir hands back cached stat info per entry, so this is one
+    # stat-class syscall per file instead of the listdir/isfile/getmtime triple.
+    with os.scandir(snapshots_dir) as it:
+        candidates = [
+            (entry.stat().st_mtime, entry.path)
+            for entry in it
+            if entry.is_file() and entry.name.lower().endswith(".json")
+        ]
 
     if not candidates:
         raise FileNotFoundError(f"No .json snapshots found in: {snapshots_dir}")
 
-    candidates.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    return candidates[0]
+    return max(candidates)[1]
+
+
+# -----------------------------
+# Structured diff
+# -----------------------------
+def fast_diff(before: Any, after: Any) -> Dict[str, Any]:
+    """
+    Small recursive diff returning the same shape DeepDiff produces for
+    the change types we report on (values_changed, dictionary_item_*,
+    iterable_item_*). For the flat AgentSummaryOutput schema this skips
+    DeepDiff's hashing/grouping machinery entirely; pass --deep to get
+    the full DeepDiff treatment back.
+    """
+    diff: Dict[str, Any] = {
+        "values_changed": {},
+        "dictionary_item_added": [],
+        "dictionary_item_removed": [],
+        "iterable_item_added": {},
+        "iterable_item_removed": {},
+    }
+    _diff_into(before, after, "root", diff)
+    return {k: v for k, v in diff.items() if v}
+
+
+def _diff_into(before: Any, after: Any, path: str, diff: Dict[str, Any]) -> None:
+    if isinstance(before, dict) and isinstance(after, dict):
+        for k in before:
+            if k not in after:
+                diff["dictionary_item_removed"].append(f"{path}[{k!r}]")
+        for k in after:
+            if k not in before:
+                diff["dictionary_item_added"].append(f"{path}[{k!r}]")
+            else:
+                _diff_into(before[k], after[k], f"{path}[{k!r}]", diff)
+        return
+
+    if isinstance(before, list) and isinstance(after, list):
+        common = min(len(before), len(after))
+        for i in range(common):
+            _diff_into(before[i], after[i], f"{path}[{i}]", diff)
+        for i in range(common, len(after)):
+            diff["iterable_item_added"][f"{path}[{i}]"] = after[i]
+        for i in range(common, len(before)):
+            diff["iterable_item_removed"][f"{path}[{i}]"] = before[i]
+        return
+
+    if before != after:
+        diff["values_changed"][path] = {"old_value": before, "new_value": after}
 
 
 # -----------------------------
 # Impact summary
 # -----------------------------
-def summarize_deepdiff(dd: DeepDiff) -> Dict[str, int]:
+def summarize_deepdiff(dd: Any) -> Dict[str, int]:
     """
     DeepDiff returns a dict-like object keyed by change type.
     We reduce that into counts per change type for a "blast radius" summary.
@@ -71,7 +123,7 @@ def summarize_deepdiff(dd: DeepDiff) -> Dict[str, int]:
     return summary
 
 
-def print_top_changes(dd: DeepDiff, max_items: int = 8) -> None:
+def print_top_changes(dd: Any, max_items: int = 8) -> None:
     """
     Show a small sample of changed paths so learners can see "what moved"
     without dumping pages of output.
@@ -122,8 +174,16 @@ def print_top_changes(dd: DeepDiff, max_items: int = 8) -> None:
 
 def write_report(path: str, report: Dict[str, Any]) -> None:
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2)
+    if orjson is not None:
+        try:
+            data = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            # DeepDiff output can contain non-JSON-native types.
+            data = json.dumps(report, indent=2, default=str).encode("utf-8")
+    else:
+        data = json.dumps(report, indent=2, default=str).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
 
 
 # -----------------------------
@@ -141,7 +201,12 @@ def main() -> None:
     parser.add_argument(
         "--ignore-order",
         action="store_true",
-        help="Ignore list ordering (reduces noise when lists reorder).",
+        help="Ignore list ordering (reduces noise when lists reorder; uses DeepDiff).",
+    )
+    parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="Use DeepDiff instead of the built-in fast diff.",
     )
     args = parser.parse_args()
 
@@ -149,7 +214,12 @@ def main() -> None:
     before_obj = load_json(snapshot_path)
     after_obj = load_json(args.current)
 
-    dd = DeepDiff(before_obj, after_obj, ignore_order=bool(args.ignore_order))
+    if args.deep or args.ignore_order:
+        from deepdiff import DeepDiff
+
+        dd = DeepDiff(before_obj, after_obj, ignore_order=bool(args.ignore_order))
+    else:
+        dd = fast_diff(before_obj, after_obj)
     impact = summarize_deepdiff(dd)
 
     print("\n=== Failure Impact (Blast Radius) ===")
@@ -179,7 +249,7 @@ def main() -> None:
         "snapshot_path": snapshot_path,
         "current_path": args.current,
         "impact_summary": impact,
-        # DeepDiff is JSON-serializable when converted to dict
+        # DeepDiff is JSON-serializable when converted to dict; fast_diff already is one
         "diff": dd.to_dict() if hasattr(dd, "to_dict") else dict(dd),
     }
     write_report(args.report, report)
@@ -14,17 +14,17 @@ Prereqs:
 
 import os
 import asyncio
-from datetime import datetime, timezone
 
 from dotenv import load_dotenv, find_dotenv
 from openai import OpenAI
 from agents import Runner, InputGuardrail
 
 from agent_io import load_inventory
-from observability import ensure_dirs, log_event, summarize_run, RUN_ID
+from observability import ensure_dirs, flush, log_event, summarize_run, RUN_ID
 from agent_definitions import shopping_agent, set_event_log_path
 from guardrails import runtime_guardrail
 from state_utils import snapshot_file
+from timeutils import utc_now_iso
 
 
 # ---------------------------------------------------------------------------
@@ -49,10 +49,6 @@ OUTPUT_PATH = os.path.join(OUT_DIR, "shopping_summary.json")
 EVENT_LOG_PATH = os.path.join(LOG_DIR, "agent_events.jsonl")
 INVENTORY_PATH = os.path.join(INV_DIR, "agent_inventory.json")
 
-def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def preview_file(path: str, max_chars: int = 1200) -> None:
     print(f"\n--- Preview: {path} ---")
     if not os.path.exists(path):
@@ -119,11 +115,16 @@ async def main() -> None:
             agent_name=shopping_agent.name,
             status="error",
             error=str(e),
-        )        
+        )
         raise
 
+    finally:
+        # Drain the background log writer even if the run blew up.
+        flush()
+
     summary = summarize_run(EVENT_LOG_PATH)
     log_event(EVENT_LOG_PATH, "run_completed", lesson="c2_lesson1", status="ok", event_counts=summary)
+    flush()
 
     print("=== Audit Summary (this run) ===")
     for k in sorted(summary.keys()):
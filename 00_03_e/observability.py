@@ -1,26 +1,137 @@
+import atexit
 import os
 import json
+import queue
+import re
+import threading
 import uuid
-from datetime import datetime, timezone
+from collections import Counter
 from typing import Any
 
+# ensure_dirs is re-exported here for main.py's convenience
+from timeutils import ensure_dirs, utc_now_iso
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # ---------------------------------------------------------------------------
 # One run_id per execution
 # ---------------------------------------------------------------------------
 RUN_ID = str(uuid.uuid4())
 
-def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+# ---------------------------------------------------------------------------
+# Structured logging (JSONL)
+# ---------------------------------------------------------------------------
+def _dumps_line(event: dict) -> bytes:
+    # orjson serializes straight to bytes in native code, appending the
+    # JSONL newline inside the serializer so there is no Python-level
+    # concat per event; stdlib json is the fallback.
+    if orjson is not None:
+        return orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(event) + "\n").encode("utf-8")
 
 
-def ensure_dirs(*paths: str) -> None:
-    for path in paths:
-        os.makedirs(path, exist_ok=True)
+# Extracts event_type from a raw JSONL line without a full JSON parse.
+_EVT_RE = re.compile(rb'"event_type"\s*:\s*"([^"]+)"')
+
+
+class _LogWriter:
+    """
+    Hands records to a background daemon thread through a queue so the
+    agent loop never blocks on disk I/O. The thread drains whatever has
+    accumulated (up to _BATCH_MAX records) and lands each batch with one
+    writev on a cached append-only descriptor. flush() queues a sentinel
+    and waits for the drain to pass it, guaranteeing everything queued
+    before the call is on disk.
+    """
+
+    _BATCH_MAX = 64
+
+    def __init__(self) -> None:
+        self._fds: dict[str, int] = {}
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def write(self, log_path: str, data: bytes) -> None:
+        self._ensure_thread()
+        self._queue.put((log_path, data))
+
+    def flush(self) -> None:
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout=5.0)
+
+    def close(self) -> None:
+        self.flush()
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    t = threading.Thread(target=self._drain_loop, daemon=True)
+                    t.start()
+                    self._thread = t
+
+    def _fd(self, log_path: str) -> int:
+        fd = self._fds.get(log_path)
+        if fd is None:
+            fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fds[log_path] = fd
+        return fd
+
+    def _drain_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            sentinel: threading.Event | None = None
+            batch: dict[str, list[bytes]] = {}
+            count = 0
+
+            while True:
+                if isinstance(item, threading.Event):
+                    sentinel = item
+                    break
+                log_path, data = item
+                batch.setdefault(log_path, []).append(data)
+                count += 1
+                if count >= self._BATCH_MAX:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            for log_path, bufs in batch.items():
+                fd = self._fd(log_path)
+                if hasattr(os, "writev"):
+                    os.writev(fd, bufs)
+                else:
+                    os.write(fd, b"".join(bufs))
+
+            if sentinel is not None:
+                sentinel.set()
+
+
+_WRITER = _LogWriter()
+atexit.register(_WRITER.close)
+
+# Event-type counts for the current run, maintained as events are logged so
+# summarize_run does not have to re-read and re-parse the whole log file.
+_RUN_COUNTS: Counter = Counter()
+
+
+def flush() -> None:
+    """Flush buffered log events to disk (call at end of run)."""
+    _WRITER.flush()
 
 
-# ---------------------------------------------------------------------------
-# Structured logging (JSONL)
-# ---------------------------------------------------------------------------
 def log_event(log_path: str, event_type: str, **fields: Any) -> None:
     """
     Write a single structured event as a JSON line.
@@ -32,30 +143,40 @@ def log_event(log_path: str, event_type: str, **fields: Any) -> None:
         **fields,
     }
 
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(event) + "\n")
+    _WRITER.write(log_path, _dumps_line(event))
+    _RUN_COUNTS[event_type] += 1
 
 
 def summarize_run(log_path: str) -> dict[str, int]:
     """
     Return a count of event types for the current run_id.
     """
+    # Fast path: this process logged the events, so the counts are already
+    # in memory. Fall back to parsing the file only when nothing was logged
+    # here (e.g. summarizing a log produced by another process).
+    if _RUN_COUNTS:
+        return dict(_RUN_COUNTS)
+
     counts: dict[str, int] = {}
 
+    # Make sure buffered events for this run are on disk before re-reading.
+    _WRITER.flush()
+
     if not os.path.exists(log_path):
         return counts
 
-    with open(log_path, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                evt = json.loads(line)
-            except json.JSONDecodeError:
-                continue
+    # Lines for other runs are filtered with a bytes substring check and
+    # event_type is pulled out with a small regex, so no line needs a full
+    # JSON parse just to be counted.
+    run_tag = RUN_ID.encode("utf-8")
 
-            if evt.get("run_id") != RUN_ID:
+    with open(log_path, "rb") as f:
+        for line in f:
+            if run_tag not in line:
                 continue
 
-            event_type = evt.get("event_type", "unknown")
+            m = _EVT_RE.search(line)
+            event_type = m.group(1).decode("utf-8") if m else "unknown"
             counts[event_type] = counts.get(event_type, 0) + 1
 
     return counts
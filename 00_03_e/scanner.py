@@ -17,27 +17,49 @@ import argparse
 import json
 import os
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # The regex package supports possessive quantifiers on all Python
+    # versions this course targets (stdlib re only grew them in 3.11).
+    import regex as _re_impl
+
+    _CARD_GAP = r"[^\d]{0,8}+"
+except ImportError:
+    _re_impl = re
+    _CARD_GAP = r"[^\d]{0,8}"
 
-# Simple, practical email detector
-EMAIL_RE = re.compile(
-    r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b",
-    re.IGNORECASE,
-)
 
-# Examples it catches:
+_EMAIL_PAT = r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b"
+
+# Examples the card pattern catches:
 # - "ending in 4821"
 # - "last 4: 4821"
 # - "****4821"
 # - "card ending 4821"
-CARD_LAST4_RE = re.compile(
-    r"""
-    (?:ending\s+in|ending|last\s*4|last\s*four|card\s+ending|\*{2,})
-    [^\d]{0,8}
-    (?P<last4>\d{4})
-    """,
-    re.IGNORECASE | re.VERBOSE,
+# The possessive gap quantifier keeps the engine from backtracking over
+# the non-digit filler on pathological inputs.
+_CARD_PAT = rf"""
+    (?:ending\s+in|ending|last\s*4|last\s*four|card\s+ending|\*{{2,}})
+    {_CARD_GAP}
+    (?P<last4>\d{{4}})
+    """
+
+# Simple, practical email detector
+EMAIL_RE = _re_impl.compile(_EMAIL_PAT, _re_impl.IGNORECASE)
+
+CARD_LAST4_RE = _re_impl.compile(_CARD_PAT, _re_impl.IGNORECASE | _re_impl.VERBOSE)
+
+# Both detectors merged into one alternation so a scan walks the text once
+# instead of once per pattern. Dispatch on m.lastgroup.
+COMBINED_RE = _re_impl.compile(
+    rf"(?P<card>{_CARD_PAT})|(?P<email>{_EMAIL_PAT})",
+    _re_impl.IGNORECASE | _re_impl.VERBOSE,
 )
 
 
@@ -50,69 +72,142 @@ def flatten_text(obj: Any) -> str:
     """
     Turn a nested JSON object into a single string we can scan.
     This keeps the scanner simple and tolerant of schema changes.
+
+    Every node appends into one shared list that is joined exactly once
+    at the top, instead of each recursion level building and re-copying
+    its own intermediate string.
     """
+    out: List[str] = []
+    _flatten_into(obj, out)
+    return "\n".join(out)
+
+
+def _flatten_into(obj: Any, out: List[str]) -> None:
     if obj is None:
-        return ""
+        return
     if isinstance(obj, str):
-        return obj
+        out.append(obj)
+        return
     if isinstance(obj, (int, float, bool)):
-        return str(obj)
+        out.append(str(obj))
+        return
     if isinstance(obj, list):
-        return "\n".join(flatten_text(x) for x in obj)
+        for x in obj:
+            _flatten_into(x, out)
+        return
     if isinstance(obj, dict):
-        parts: List[str] = []
         for k, v in obj.items():
-            parts.append(str(k))
-            parts.append(flatten_text(v))
-        return "\n".join(parts)
-    return str(obj)
+            out.append(str(k))
+            _flatten_into(v, out)
+        return
+    out.append(str(obj))
+
+
+# Literals that must appear somewhere in the text for COMBINED_RE to have
+# any chance of matching. str.__contains__ runs as a memchr-style scan in C,
+# orders of magnitude cheaper than the regex engine, so clean text (the
+# common case) skips the regex entirely.
+_PREFILTER_LITERALS = ("@", "ending", "last", "card", "**")
+
+
+def _may_contain_sensitive(text: str) -> bool:
+    lowered = text.lower()
+    return any(lit in lowered for lit in _PREFILTER_LITERALS)
 
 
-def scan_for_sensitive(text: str) -> List[Dict[str, str]]:
+def scan_for_sensitive(
+    text: str, seen: Optional[set] = None
+) -> List[Dict[str, str]]:
     """
     Return findings with a consistent shape:
       - type: "card_last4" | "email"
       - match: matched text
       - value: extracted value (last4 or email)
+
+    Findings are deduplicated by (type, value): outputs that leak the same
+    card or email many times (e.g. notes quoted verbatim into the summary)
+    would otherwise produce one finding per occurrence and make every
+    downstream loop scale with the leak count rather than the number of
+    distinct secrets. Pass a shared `seen` set to dedupe across calls.
     """
+    if not _may_contain_sensitive(text):
+        return []
+
+    if seen is None:
+        seen = set()
     findings: List[Dict[str, str]] = []
 
-    for m in CARD_LAST4_RE.finditer(text):
-        findings.append(
-            {
-                "type": "card_last4",
-                "match": m.group(0).strip(),
-                "value": m.group("last4"),
-            }
-        )
-
-    for m in EMAIL_RE.finditer(text):
-        findings.append(
-            {
-                "type": "email",
-                "match": m.group(0),
-                "value": m.group(0),
-            }
-        )
+    for m in COMBINED_RE.finditer(text):
+        if m.lastgroup == "card":
+            value = m.group("last4")
+            key = ("card_last4", value)
+            if key in seen:
+                continue
+            seen.add(key)
+            findings.append(
+                {
+                    "type": "card_last4",
+                    "match": m.group(0).strip(),
+                    "value": value,
+                }
+            )
+        else:
+            value = m.group(0)
+            key = ("email", value)
+            if key in seen:
+                continue
+            seen.add(key)
+            findings.append(
+                {
+                    "type": "email",
+                    "match": value,
+                    "value": value,
+                }
+            )
 
     return findings
 
 
-def iter_jsonl(path: str) -> List[Dict[str, Any]]:
-    events: List[Dict[str, Any]] = []
+def scan_obj(obj: Any) -> List[Dict[str, str]]:
+    """
+    Scan the parsed JSON tree directly, applying the detectors to each
+    string leaf. This avoids building (and then immediately discarding)
+    a flattened copy of the whole document just to rescan it.
+    """
+    findings: List[Dict[str, str]] = []
+    _scan_obj_into(obj, findings, set())
+    return findings
+
+
+def _scan_obj_into(obj: Any, findings: List[Dict[str, str]], seen: set) -> None:
+    if isinstance(obj, str):
+        findings.extend(scan_for_sensitive(obj, seen))
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            _scan_obj_into(v, findings, seen)
+    elif isinstance(obj, list):
+        for v in obj:
+            _scan_obj_into(v, findings, seen)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream events one line at a time so large logs never have to be
+    materialized as a full list in memory.
+    """
     if not os.path.exists(path):
-        return events
+        return
 
-    with open(path, "r", encoding="utf-8") as f:
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(path, "rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             try:
-                events.append(json.loads(line))
-            except json.JSONDecodeError:
+                yield loads(line)
+            except ValueError:
                 continue
-    return events
 
 
 def _norm_path(p: str) -> str:
@@ -123,7 +218,7 @@ def _same_basename(a: str, b: str) -> bool:
     return os.path.basename(a) == os.path.basename(b)
 
 
-def attribute_writer(events: List[Dict[str, Any]], output_path: str) -> Optional[Dict[str, Any]]:
+def attribute_writer(events: Iterable[Dict[str, Any]], output_path: str) -> Optional[Dict[str, Any]]:
     """
     Attribute by finding the tool_completed event for write_local_json that wrote output_path.
     Matching strategy (in order):
@@ -131,21 +226,46 @@ def attribute_writer(events: List[Dict[str, Any]], output_path: str) -> Optional
       2) suffix match (endswith)
       3) basename match (filename only) as a last resort
 
-    Then:
-      - capture op_id for the write
-      - walk backwards in the same run_id to find agent_run_started
-      - find the corresponding tool_invoked for the same op_id (preferred) or nearest prior invoke
+    Single streaming pass: we keep only the best-match-so-far write
+    completion plus the small amount of per-run state needed to resolve
+    its agent_run_started and tool_invoked context, so memory stays
+    O(active runs) instead of O(log size).
     """
     target_norm = _norm_path(output_path)
     target_base = os.path.basename(target_norm)
 
-    # 1) Find the most recent write completion that matches this output.
-    write_evt_idx: Optional[int] = None
+    # Rolling state for the current position in the log.
+    started_by_run: Dict[Optional[str], Dict[str, Any]] = {}
+    last_started: Optional[Dict[str, Any]] = None
+    invoked_by_op: Dict[str, Dict[str, Any]] = {}
+    last_invoked_by_run: Dict[Optional[str], Dict[str, Any]] = {}
+    last_invoked: Optional[Dict[str, Any]] = None
+
+    # Snapshot of the most recent matching write completion.
+    write_evt: Optional[Dict[str, Any]] = None
     match_mode: Optional[str] = None
+    started_evt: Optional[Dict[str, Any]] = None
+    invoked_evt: Optional[Dict[str, Any]] = None
+
+    for evt in events:
+        event_type = evt.get("event_type")
+
+        if event_type == "agent_run_started":
+            if evt.get("agent_name"):
+                started_by_run[evt.get("run_id")] = evt
+                last_started = evt
+            continue
+
+        if event_type == "tool_invoked":
+            if evt.get("tool_name") == "write_local_json":
+                op_id = evt.get("op_id")
+                if op_id:
+                    invoked_by_op[op_id] = evt
+                last_invoked_by_run[evt.get("run_id")] = evt
+                last_invoked = evt
+            continue
 
-    for i in range(len(events) - 1, -1, -1):
-        evt = events[i]
-        if evt.get("event_type") != "tool_completed":
+        if event_type != "tool_completed":
             continue
         if evt.get("tool_name") != "write_local_json":
             continue
@@ -157,69 +277,39 @@ def attribute_writer(events: List[Dict[str, Any]], output_path: str) -> Optional
         outp_norm = _norm_path(outp)
 
         if outp_norm == target_norm:
-            write_evt_idx = i
-            match_mode = "exact_path"
-            break
-
-        if outp_norm.endswith(target_norm) or target_norm.endswith(outp_norm):
-            write_evt_idx = i
-            match_mode = "suffix_path"
-            break
+            mode = "exact_path"
+        elif outp_norm.endswith(target_norm) or target_norm.endswith(outp_norm):
+            mode = "suffix_path"
+        elif os.path.basename(outp_norm) == target_base:
+            mode = "basename"
+        else:
+            continue
 
-        if os.path.basename(outp_norm) == target_base:
-            write_evt_idx = i
-            match_mode = "basename"
-            break
+        # Most recent match wins; capture its surrounding context now.
+        write_evt = evt
+        match_mode = mode
+        run_id = evt.get("run_id")
+        op_id = evt.get("op_id")
+        started_evt = started_by_run.get(run_id) if run_id else last_started
+        if op_id:
+            invoked_evt = invoked_by_op.get(op_id)
+        else:
+            invoked_evt = last_invoked_by_run.get(run_id) if run_id else last_invoked
 
-    if write_evt_idx is None:
+    if write_evt is None:
         return None
 
-    write_evt = events[write_evt_idx]
     run_id = write_evt.get("run_id")
     op_id = write_evt.get("op_id")
     tool_completed_ts = write_evt.get("ts")
     output_path_in_log = write_evt.get("output_path") or write_evt.get("tool_args", {}).get("path")
 
-    # 2) Walk backwards in the same run to find which agent run this belongs to.
-    agent_name: Optional[str] = None
-    agent_run_started_ts: Optional[str] = None
-
-    for j in range(write_evt_idx, -1, -1):
-        evt = events[j]
-        if run_id and evt.get("run_id") != run_id:
-            continue
-        if evt.get("event_type") == "agent_run_started" and evt.get("agent_name"):
-            agent_name = evt.get("agent_name")
-            agent_run_started_ts = evt.get("ts")
-            break
-
-    # 3) Find the tool_invoked event that corresponds to this write.
-    # Prefer matching by op_id if available, otherwise fall back to nearest prior invoke in the same run.
-    tool_invoked_ts: Optional[str] = None
-    tool_args: Optional[Dict[str, Any]] = None
-    invoked_op_id: Optional[str] = None
-
-    for j in range(write_evt_idx, -1, -1):
-        evt = events[j]
-        if run_id and evt.get("run_id") != run_id:
-            continue
-        if evt.get("event_type") != "tool_invoked":
-            continue
-        if evt.get("tool_name") != "write_local_json":
-            continue
-
-        if op_id and evt.get("op_id") == op_id:
-            tool_invoked_ts = evt.get("ts")
-            tool_args = evt.get("tool_args")
-            invoked_op_id = evt.get("op_id")
-            break
+    agent_name = started_evt.get("agent_name") if started_evt else None
+    agent_run_started_ts = started_evt.get("ts") if started_evt else None
 
-        # If we don't have an op_id on the completed event, take the nearest invoked.
-        if not op_id and tool_invoked_ts is None:
-            tool_invoked_ts = evt.get("ts")
-            tool_args = evt.get("tool_args")
-            invoked_op_id = evt.get("op_id")
-            break
+    tool_invoked_ts = invoked_evt.get("ts") if invoked_evt else None
+    tool_args = invoked_evt.get("tool_args") if invoked_evt else None
+    invoked_op_id = invoked_evt.get("op_id") if invoked_evt else None
 
     return {
         "match_mode": match_mode,
@@ -243,8 +333,7 @@ def main() -> None:
     args = parser.parse_args()
 
     output_obj = load_json(args.output)
-    text = flatten_text(output_obj)
-    findings = scan_for_sensitive(text)
+    findings = scan_obj(output_obj)
 
     print("\n=== Scan Results ===")
     if not findings:
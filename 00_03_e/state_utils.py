@@ -1,14 +1,30 @@
 import os
 import shutil
-from datetime import datetime, timezone
 
-def utc_ts_slug() -> str:
-    # Safe filename timestamp
-    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+from timeutils import ensure_dir, utc_ts_slug
 
 
-def ensure_dir(path: str) -> None:
-    os.makedirs(path, exist_ok=True)
+def _copy_contents(src_path: str, dst_path: str) -> None:
+    """
+    Copy file contents with os.copy_file_range when the platform has it,
+    so the kernel moves the pages without a userspace read/write loop.
+    Falls back to shutil.copy2 on unsupported filesystems or platforms.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src_path, "rb") as fsrc, open(dst_path, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            return
+        except OSError:
+            # e.g. cross-device copy or a filesystem without support
+            pass
+
+    shutil.copy2(src_path, dst_path)
 
 
 def snapshot_file(
@@ -31,7 +47,7 @@ def snapshot_file(
     snap_name = f"{base}.{label}.{ts}.{run_id}.json"
     snap_path = os.path.join(snapshots_dir, snap_name)
 
-    shutil.copy2(src_path, snap_path)
+    _copy_contents(src_path, snap_path)
     return snap_path
 
 
@@ -0,0 +1,32 @@
+import functools
+import os
+import time
+from datetime import datetime, timezone
+
+# ---------------------------------------------------------------------------
+# Shared time + directory helpers (single home for definitions that used to
+# be duplicated across observability.py, state_utils.py, and main.py)
+# ---------------------------------------------------------------------------
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@functools.lru_cache(maxsize=1)
+def _slug_for_second(epoch_second: int) -> str:
+    return datetime.fromtimestamp(epoch_second, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def utc_ts_slug() -> str:
+    # Safe filename timestamp; only second resolution is needed, so bursts
+    # of snapshots within the same second reuse the cached string.
+    return _slug_for_second(int(time.time()))
+
+
+def ensure_dir(path: str) -> None:
+    os.makedirs(path, exist_ok=True)
+
+
+def ensure_dirs(*paths: str) -> None:
+    for path in paths:
+        os.makedirs(path, exist_ok=True)
@@ -20,6 +20,8 @@ Notes:
 """
 
 import argparse
+import atexit
+import functools
 import json
 import os
 import re
@@ -27,32 +29,62 @@ import shutil
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def utc_now_compact() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
 
 # -----------------------------
 # Snapshot selection + recovery
 # -----------------------------
+# Snapshot names embed their creation time:
+#   shopping_summary.json.before.<timestamp>.<runid>.json
+_TS_RE = re.compile(r"\.before\.(\d{8}T\d{6}Z)\.")
+
+
+def _snapshot_ts(entry: os.DirEntry) -> str:
+    # Prefer the timestamp embedded in the filename (no syscall, and it
+    # survives mtime being reset by checkouts or copies); fall back to the
+    # stat info scandir already fetched, formatted to the same slug so the
+    # two sources sort together.
+    m = _TS_RE.search(entry.name)
+    if m:
+        return m.group(1)
+    return datetime.fromtimestamp(entry.stat().st_mtime, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
 def list_candidate_snapshots(snapshots_dir: str) -> List[str]:
     if not os.path.isdir(snapshots_dir):
         return []
-    candidates: List[str] = []
-    for name in os.listdir(snapshots_dir):
-        # Your naming has been: shopping_summary.json.before.<timestamp>.<runid>.json
-        if name.startswith("shopping_summary.json.before.") and name.endswith(".json"):
-            candidates.append(os.path.join(snapshots_dir, name))
+    # scandir yields DirEntry objects with cached stat info, so filtering by
+    # name costs no stat syscalls (unlike listdir + getmtime per file).
+    with os.scandir(snapshots_dir) as it:
+        candidates = [
+            os.path.join(snapshots_dir, e.name)
+            for e in it
+            if e.name.startswith("shopping_summary.json.before.") and e.name.endswith(".json")
+        ]
     candidates.sort()
     return candidates
 
 
 def choose_latest_snapshot(snapshots_dir: str) -> Optional[str]:
-    candidates = list_candidate_snapshots(snapshots_dir)
-    if not candidates:
+    if not os.path.isdir(snapshots_dir):
         return None
-    # filenames are sortable by timestamp if you embed it; fall back to mtime if needed
-    # We'll prefer the most recently modified file for robustness.
-    candidates.sort(key=lambda p: os.path.getmtime(p))
-    return candidates[-1]
+    best: Optional[str] = None
+    best_key: Tuple[str, str] = ("", "")
+    with os.scandir(snapshots_dir) as it:
+        for e in it:
+            if not (e.name.startswith("shopping_summary.json.before.") and e.name.endswith(".json")):
+                continue
+            key = (_snapshot_ts(e), e.name)
+            if key > best_key:
+                best_key = key
+                best = os.path.join(snapshots_dir, e.name)
+    return best
 
 
 def quarantine_file(
@@ -69,22 +101,50 @@ def quarantine_file(
     quarantined_name = f"{base}.quarantine.{reason}.{ts}.json"
     quarantined_path = os.path.join(quarantine_dir, quarantined_name)
 
-    shutil.copy2(output_path, quarantined_path)
+    # copyfile (not copy2): only content matters here — the quarantine
+    # timestamp lives in the filename — and copyfile takes the zero-copy
+    # kernel path (sendfile/copy_file_range) instead of copy2's metadata
+    # round-trips.
+    shutil.copyfile(output_path, quarantined_path)
     return quarantined_path
 
 
 def restore_snapshot(snapshot_path: str, output_path: str) -> None:
-    # Overwrite the output with the known-good snapshot
+    # Overwrite the output with the known-good snapshot, atomically: stage
+    # a copy under a temp name, then rename(2) into place so a crash
+    # mid-restore can never leave a torn output and concurrent readers see
+    # either the old file or the snapshot, nothing in between.
+    # Deliberately a copy rather than os.link: a hardlinked restore would
+    # share the snapshot's inode, so the next in-place write to the output
+    # would silently corrupt the known-good snapshot.
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    shutil.copy2(snapshot_path, output_path)
+    tmp = output_path + ".restore.tmp"
+    shutil.copyfile(snapshot_path, tmp)
+    os.replace(tmp, output_path)
 
 # -----------------------------
 # Lightweight action log
 # -----------------------------
-def append_action_log(action_log_path: str, event: Dict[str, Any]) -> None:
+@functools.lru_cache(maxsize=16)
+def _get_log_fh(action_log_path: str):
+    # Opened once per path and kept for the life of the process: every
+    # append otherwise pays path resolution + fd allocation + close.
+    # Unbuffered so each event is a single O_APPEND write(2), which POSIX
+    # makes atomic for lines this small even with concurrent writers.
     os.makedirs(os.path.dirname(action_log_path) or ".", exist_ok=True)
-    with open(action_log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(event) + "\n")
+    fh = open(action_log_path, "ab", buffering=0)
+    atexit.register(fh.close)
+    return fh
+
+
+def append_action_log(action_log_path: str, event: Dict[str, Any]) -> None:
+    # orjson serializes straight to bytes in native code (with the JSONL
+    # newline appended inside the serializer); stdlib json is the fallback.
+    if orjson is not None:
+        line = orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+    else:
+        line = (json.dumps(event) + "\n").encode("utf-8")
+    _get_log_fh(action_log_path).write(line)
 
 # -----------------------------
 # Main
@@ -42,6 +42,22 @@ CARD_LAST4_RE = re.compile(
     re.IGNORECASE | re.VERBOSE,
 )
 
+# Both detectors fused into one alternation so scanning walks the text once
+# instead of once per pattern. Dispatch on m.lastgroup: it reports "card"
+# (the outer group, which closes last) for card hits and "email" otherwise.
+SENSITIVE_RE = re.compile(
+    r"""
+    (?P<card>
+        (?:ending\s+in|ending|last\s*4|last\s*four|card\s+ending|\*{2,})
+        [^\d]{0,8}
+        (?P<last4>\d{4})
+    )
+    |
+    (?P<email>\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b)
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
 
 def load_json(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
@@ -70,6 +86,12 @@ def flatten_text(obj: Any) -> str:
     return str(obj)
 
 
+# Literals at least one of which must be present for SENSITIVE_RE to match.
+# str.__contains__ is a memchr-style scan in C, orders of magnitude cheaper
+# than the regex engine, so clean text (the common case) skips it entirely.
+_PREFILTER_LITERALS = ("@", "ending", "last", "**")
+
+
 def scan_for_sensitive(text: str) -> List[Dict[str, str]]:
     """
     Return findings with a consistent shape:
@@ -77,25 +99,29 @@ def scan_for_sensitive(text: str) -> List[Dict[str, str]]:
       - match: matched text
       - value: extracted value (last4 or email)
     """
+    lowered = text.lower()
+    if not any(lit in lowered for lit in _PREFILTER_LITERALS):
+        return []
+
     findings: List[Dict[str, str]] = []
 
-    for m in CARD_LAST4_RE.finditer(text):
-        findings.append(
-            {
-                "type": "card_last4",
-                "match": m.group(0).strip(),
-                "value": m.group("last4"),
-            }
-        )
-
-    for m in EMAIL_RE.finditer(text):
-        findings.append(
-            {
-                "type": "email",
-                "match": m.group(0),
-                "value": m.group(0),
-            }
-        )
+    for m in SENSITIVE_RE.finditer(text):
+        if m.lastgroup == "card":
+            findings.append(
+                {
+                    "type": "card_last4",
+                    "match": m.group(0).strip(),
+                    "value": m.group("last4"),
+                }
+            )
+        else:
+            findings.append(
+                {
+                    "type": "email",
+                    "match": m.group(0),
+                    "value": m.group(0),
+                }
+            )
 
     return findings
 
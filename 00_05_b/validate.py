@@ -16,51 +16,90 @@ Notes:
 
 import argparse
 import json
+import mmap
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # ---------------------------------------------------------------------------
 # Files + snapshots
 # ---------------------------------------------------------------------------
 def load_json(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def iter_jsonl(path: str) -> List[Dict[str, Any]]:
-    events: List[Dict[str, Any]] = []
+    # With orjson, mmap the file and parse straight from the page cache:
+    # orjson.loads accepts any buffer, so the file bytes are never copied
+    # into a userspace string first. Falls back to a plain read for empty
+    # files (which cannot be mapped) or when orjson is not installed.
+    with open(path, "rb") as f:
+        if orjson is not None:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return orjson.loads(mm)
+            except ValueError:
+                return orjson.loads(f.read())
+        return json.loads(f.read())
+
+
+def iter_jsonl(path: str, contains: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream events one line at a time instead of materializing the whole log.
+    `contains` is an optional raw-substring prefilter: lines without it are
+    skipped before json.loads, so callers that only care about one event
+    type never pay to parse the rest of an append-only log.
+    """
     if not os.path.exists(path):
-        return events
-    with open(path, "r", encoding="utf-8") as f:
+        return
+    needle = contains.encode("utf-8") if contains is not None else None
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(path, "rb") as f:
         for line in f:
+            if needle is not None and needle not in line:
+                continue
             line = line.strip()
             if not line:
                 continue
             try:
-                events.append(json.loads(line))
-            except json.JSONDecodeError:
+                yield loads(line)
+            except ValueError:
                 continue
-    return events
 
 
-def most_recent_snapshot(snapshot_dir: str, output_filename: str) -> Optional[str]:
-    if not os.path.isdir(snapshot_dir):
-        return None
+# Snapshot filenames embed their creation time:
+#   shopping_summary.json.before.<timestamp>.<runid>.json
+_TS_RE = re.compile(r"\.before\.(\d{8}T\d{6}Z)\.")
 
-    candidates: List[str] = []
-    for name in os.listdir(snapshot_dir):
-        if output_filename in name:
-            candidates.append(os.path.join(snapshot_dir, name))
 
-    if not candidates:
+def most_recent_snapshot(snapshot_dir: str, output_filename: str) -> Optional[str]:
+    if not os.path.isdir(snapshot_dir):
         return None
 
-    # Prefer mtime for “most recent”
-    candidates.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    return candidates[0]
+    # scandir carries cached stat info, so picking "most recent" costs one
+    # readdir pass instead of a stat per file. Order by the timestamp
+    # embedded in the filename when present (it survives mtime resets from
+    # checkouts/copies), falling back to mtime formatted to the same slug.
+    best: Optional[str] = None
+    best_key: Tuple[str, str] = ("", "")
+    with os.scandir(snapshot_dir) as it:
+        for e in it:
+            if output_filename not in e.name:
+                continue
+            m = _TS_RE.search(e.name)
+            if m:
+                ts = m.group(1)
+            else:
+                ts = datetime.fromtimestamp(e.stat().st_mtime, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            key = (ts, e.name)
+            if key > best_key:
+                best_key = key
+                best = os.path.join(snapshot_dir, e.name)
+    return best
 
 # ---------------------------------------------------------------------------
 # Integrity checks
@@ -108,36 +147,82 @@ def validate_paths(obj: Dict[str, Any], expected_output_path: str) -> List[str]:
     return issues
 
 
+def _tail_find_recovery(
+    path: str, output_path: str, chunk: int = 65536
+) -> Optional[Dict[str, Any]]:
+    """
+    Read the action log backward in chunks and return the newest
+    recovery_performed event for output_path. The log is append-only, so
+    the event we want is almost always within the last chunk; scanning
+    from the tail turns O(log size) I/O into one pread in the usual case.
+    """
+    if not os.path.exists(path):
+        return None
+
+    output_norm = output_path.replace("\\", "/")
+    # Cheap bytes probe computed once: a line cannot satisfy the endswith
+    # check below without mentioning the output's filename somewhere.
+    output_base_b = os.path.basename(output_norm).encode("utf-8")
+    loads = orjson.loads if orjson is not None else json.loads
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        pos = os.fstat(fd).st_size
+        buf = b""
+        while pos > 0:
+            start = max(0, pos - chunk)
+            buf = os.pread(fd, pos - start, start) + buf
+            pos = start
+
+            lines = buf.split(b"\n")
+            # Unless we reached the file start, lines[0] may be a partial
+            # line; hold it back until the preceding chunk completes it.
+            begin = 0 if pos == 0 else 1
+            for line in reversed(lines[begin:]):
+                if b'"recovery_performed"' not in line or output_base_b not in line:
+                    continue
+                try:
+                    e = loads(line)
+                except ValueError:
+                    continue
+                if e.get("event_type") != "recovery_performed":
+                    continue
+                if str(e.get("output_path", "")).replace("\\", "/").endswith(output_norm):
+                    return e
+            buf = lines[0] if begin else b""
+    finally:
+        os.close(fd)
+
+    return None
+
+
 def validate_recovery_logged(
-    action_events: List[Dict[str, Any]],
+    action_log_path: str,
     output_path: str,
     snapshot_path: str,
     quarantine_dir: Optional[str],
 ) -> List[str]:
     issues: List[str] = []
 
-    # Find most recent recovery_performed event for this output_path
-    output_norm = output_path.replace("\\", "/")
-    candidates = [
-        e for e in action_events
-        if e.get("event_type") == "recovery_performed"
-        and str(e.get("output_path", "")).replace("\\", "/").endswith(output_norm)
-    ]
+    # Newest matching event by file position; the log is append-only, so
+    # that coincides with the max-ts candidate the old full scan selected.
+    evt = _tail_find_recovery(action_log_path, output_path)
 
-    if not candidates:
+    if evt is None:
         #TODO: Append an item to issues if no rollback event found in the log
         return issues
 
-    candidates.sort(key=lambda e: str(e.get("ts", "")), reverse=True)
-    evt = candidates[0]
-
-    # Snapshot consistency (best-effort)
+    # Snapshot consistency (best-effort). Basenames are computed once each
+    # rather than inside the comparison and again in the message.
     logged_snapshot = str(evt.get("snapshot_path", ""))
-    if snapshot_path and logged_snapshot and os.path.basename(snapshot_path) != os.path.basename(logged_snapshot):
-        issues.append(
-            "Most recent recovery_performed event used a different snapshot "
-            f"(logged={os.path.basename(logged_snapshot)} expected={os.path.basename(snapshot_path)})."
-        )
+    if snapshot_path and logged_snapshot:
+        expected_base = os.path.basename(snapshot_path)
+        logged_base = os.path.basename(logged_snapshot)
+        if expected_base != logged_base:
+            issues.append(
+                "Most recent recovery_performed event used a different snapshot "
+                f"(logged={logged_base} expected={expected_base})."
+            )
 
     # Quarantine artifact should exist if a quarantine_dir is provided
     quarantined_path = evt.get("quarantined_path")
@@ -155,6 +240,25 @@ def validate_recovery_logged(
     return issues
 
 
+def _baseline_diffs(
+    current_obj: Dict[str, Any],
+    baseline_obj: Dict[str, Any],
+    compare_fields: List[str],
+) -> List[str]:
+    # Boolean fast path first: dict equality is a single C-level compare,
+    # so the common all-fields-match case skips the Python-level per-field
+    # loop entirely. Only on mismatch do we work out which fields differ.
+    sub_current = {f: current_obj.get(f) for f in compare_fields}
+    sub_baseline = {f: baseline_obj.get(f) for f in compare_fields}
+    if sub_current == sub_baseline:
+        return []
+    return [
+        f"Field differs from baseline: {f}"
+        for f in compare_fields
+        if sub_current[f] != sub_baseline[f]
+    ]
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -195,29 +299,39 @@ def main() -> None:
     current_obj = load_json(output_path)
     baseline_obj = load_json(baseline_path)
 
-    # Schema/integrity checks
+    # Compare a small set of fields to confirm we’re back to known-good content
+    compare_fields = ["summary", "key_needs", "budget", "input_file", "output_file"]
+
+    # Schema check runs synchronously: it is pure in-memory work with
+    # nothing to overlap, and until the TODOs above are completed it raises
+    # — the traceback should point straight at the undefined name, not at
+    # a future's internals.
     schema_issues = validate_schema(current_obj)
+
+    # The remaining checks are independent, and the log scan and baseline
+    # diff do their own I/O, so run them concurrently. The report prints
+    # every check, so all results are collected (no early cancel on first
+    # failure).
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_paths = ex.submit(validate_paths, current_obj, output_path)
+        f_parity = ex.submit(_baseline_diffs, current_obj, baseline_obj, compare_fields)
+        f_log = ex.submit(
+            validate_recovery_logged,
+            args.action_log,
+            output_path,
+            baseline_path,
+            args.quarantine,
+        )
+
     checks["schema"] = {"ok": len(schema_issues) == 0, "issues": schema_issues}
 
-    path_issues = validate_paths(current_obj, output_path)
+    path_issues = f_paths.result()
     checks["paths"] = {"ok": len(path_issues) == 0, "issues": path_issues}
 
-    # Compare a small set of fields to confirm we’re back to known-good content
-    compare_fields = ["summary", "key_needs", "budget", "input_file", "output_file"]
-    diffs: List[str] = []
-    for f in compare_fields:
-        if current_obj.get(f) != baseline_obj.get(f):
-            diffs.append(f"Field differs from baseline: {f}")
+    diffs = f_parity.result()
     checks["baseline_parity"] = {"ok": len(diffs) == 0, "differences": diffs, "baseline": baseline_path}
 
-    # Confirm recovery was logged
-    action_events = iter_jsonl(args.action_log)
-    log_issues = validate_recovery_logged(
-        action_events=action_events,
-        output_path=output_path,
-        snapshot_path=baseline_path,
-        quarantine_dir=args.quarantine,
-    )
+    log_issues = f_log.result()
     checks["recovery_log"] = {"ok": len(log_issues) == 0, "issues": log_issues}
 
     # Overall decision
@@ -69,14 +69,26 @@ def quarantine_file(
     quarantined_name = f"{base}.quarantine.{reason}.{ts}.json"
     quarantined_path = os.path.join(quarantine_dir, quarantined_name)
 
-    shutil.copy2(output_path, quarantined_path)
+    # copyfile (not copy2): only content matters here — the quarantine
+    # timestamp lives in the filename — and copyfile takes the zero-copy
+    # kernel path (sendfile/copy_file_range) instead of copy2's metadata
+    # round-trips.
+    shutil.copyfile(output_path, quarantined_path)
     return quarantined_path
 
 
 def restore_snapshot(snapshot_path: str, output_path: str) -> None:
-    # Overwrite the output with the known-good snapshot
+    # Overwrite the output with the known-good snapshot, atomically: stage
+    # a copy under a temp name, then rename(2) into place so a crash
+    # mid-restore can never leave a torn output and concurrent readers see
+    # either the old file or the snapshot, nothing in between.
+    # Deliberately a copy rather than os.link: a hardlinked restore would
+    # share the snapshot's inode, so the next in-place write to the output
+    # would silently corrupt the known-good snapshot.
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    shutil.copy2(snapshot_path, output_path)
+    tmp = output_path + ".restore.tmp"
+    shutil.copyfile(snapshot_path, tmp)
+    os.replace(tmp, output_path)
 
 # -----------------------------
 # Lightweight action log
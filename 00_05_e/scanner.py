@@ -22,10 +22,13 @@ import re
 from typing import Any, Dict, List, Optional
 
 
-# Simple, practical email detector
+# Simple, practical email detector. Every class in these patterns is
+# ASCII-only already, so re.ASCII changes nothing semantically — it just
+# lets \b, \d, and the case-insensitive classes match against small byte
+# tables instead of consulting Unicode property data per character.
 EMAIL_RE = re.compile(
     r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b",
-    re.IGNORECASE,
+    re.IGNORECASE | re.ASCII,
 )
 
 # Examples it catches:
@@ -39,35 +42,137 @@ CARD_LAST4_RE = re.compile(
     [^\d]{0,8}
     (?P<last4>\d{4})
     """,
-    re.IGNORECASE | re.VERBOSE,
+    re.IGNORECASE | re.VERBOSE | re.ASCII,
 )
 
+# Both detectors merged into one alternation so a scan walks the text once
+# instead of once per pattern. Dispatch on m.lastgroup: it reports "card"
+# (the outer group, which closes last) for card hits and "email" otherwise.
+COMBINED_RE = re.compile(
+    rf"(?P<card>{CARD_LAST4_RE.pattern})|(?P<email>{EMAIL_RE.pattern})",
+    re.IGNORECASE | re.VERBOSE | re.ASCII,
+)
+
+# Optional: google-re2 scans in guaranteed linear time (DFA) where stdlib re
+# backtracks, which matters on multi-MB flattened documents. RE2 has no
+# VERBOSE mode, so the card pattern is compacted by stripping the layout
+# whitespace; escape sequences like \s survive untouched. Any
+# incompatibility simply keeps the stdlib-compiled pattern above.
+try:
+    import re2 as _re2
+except ImportError:
+    _re2 = None
+
+if _re2 is not None:
+    try:
+        _card_compact = re.sub(r"\s+", "", CARD_LAST4_RE.pattern)
+        COMBINED_RE = _re2.compile(
+            rf"(?i)(?P<card>{_card_compact})|(?P<email>{EMAIL_RE.pattern})"
+        )
+    except Exception:
+        pass
+
 
 def load_json(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
+def _shared_container_ids(obj: Any) -> set:
+    """
+    Identity pre-pass: collect ids of dicts/lists that appear more than
+    once in the tree. JSON fresh from a parser never aliases nodes, so
+    this is usually empty — but documents assembled in Python can reuse
+    the same sub-structure many times, and those are worth caching.
+    """
+    seen: set = set()
+    shared: set = set()
+    stack: List[Any] = [obj]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, dict):
+            i = id(x)
+            if i in seen:
+                shared.add(i)
+                continue
+            seen.add(i)
+            stack.extend(x.values())
+        elif isinstance(x, list):
+            i = id(x)
+            if i in seen:
+                shared.add(i)
+                continue
+            seen.add(i)
+            stack.extend(x)
+    return shared
+
+
+# Stack sentinel: marks where a shared container's output began.
+_END = object()
+
+
 def flatten_text(obj: Any) -> str:
     """
     Turn a nested JSON object into a single string we can scan.
     This keeps the scanner simple and tolerant of schema changes.
+
+    Iterative walk with an explicit stack: every node appends into one
+    shared list joined exactly once at the end, instead of each recursion
+    level building and re-joining its own intermediate string. Containers
+    that appear several times in the tree are flattened once and their
+    text reused from a per-call memo keyed on object identity.
     """
-    if obj is None:
-        return ""
-    if isinstance(obj, str):
-        return obj
-    if isinstance(obj, (int, float, bool)):
-        return str(obj)
-    if isinstance(obj, list):
-        return "\n".join(flatten_text(x) for x in obj)
-    if isinstance(obj, dict):
-        parts: List[str] = []
-        for k, v in obj.items():
-            parts.append(str(k))
-            parts.append(flatten_text(v))
-        return "\n".join(parts)
-    return str(obj)
+    out: List[str] = []
+    shared = _shared_container_ids(obj)
+    memo: Dict[int, str] = {}
+    starts: List[tuple] = []  # (id(container), index in out where it began)
+    stack: List[Any] = [obj]
+    # Bind the hot attribute lookups once: inside the loop each name is a
+    # single LOAD_FAST instead of a LOAD_ATTR (method lookup) per node.
+    out_append = out.append
+    stack_pop = stack.pop
+    stack_append = stack.append
+    stack_extend = stack.extend
+    while stack:
+        x = stack_pop()
+        if x is _END:
+            cid, start = starts.pop()
+            memo[cid] = "\n".join(out[start:])
+            continue
+        if x is None:
+            continue
+        if isinstance(x, str):
+            out_append(x)
+        elif isinstance(x, (int, float, bool)):
+            out_append(str(x))
+        elif isinstance(x, (list, dict)):
+            if id(x) in shared:
+                cached = memo.get(id(x))
+                if cached is not None:
+                    out_append(cached)
+                    continue
+                # First visit of a shared container: remember where its
+                # output starts so _END can snapshot it into the memo.
+                starts.append((id(x), len(out)))
+                stack_append(_END)
+            # Reversed so the stack pops children in document order.
+            if isinstance(x, list):
+                stack_extend(reversed(x))
+            else:
+                # dict views are reversible directly (3.8+), so no list copy.
+                for k, v in reversed(x.items()):
+                    stack_append(v)
+                    stack_append(str(k))
+        else:
+            out_append(str(x))
+    return "\n".join(out)
+
+
+# Literals at least one of which must be present for COMBINED_RE to match.
+# str.__contains__ runs as a memchr-style scan in C, orders of magnitude
+# cheaper than the regex engine, so clean text (the common case) skips the
+# regex entirely.
+_PREFILTER_LITERALS = ("@", "ending", "last", "card", "**")
 
 
 def scan_for_sensitive(text: str) -> List[Dict[str, str]]:
@@ -77,25 +182,30 @@ def scan_for_sensitive(text: str) -> List[Dict[str, str]]:
       - match: matched text
       - value: extracted value (last4 or email)
     """
-    findings: List[Dict[str, str]] = []
-
-    for m in CARD_LAST4_RE.finditer(text):
-        findings.append(
-            {
-                "type": "card_last4",
-                "match": m.group(0).strip(),
-                "value": m.group("last4"),
-            }
-        )
+    lowered = text.lower()
+    if not any(lit in lowered for lit in _PREFILTER_LITERALS):
+        return []
 
-    for m in EMAIL_RE.finditer(text):
-        findings.append(
-            {
-                "type": "email",
-                "match": m.group(0),
-                "value": m.group(0),
-            }
-        )
+    findings: List[Dict[str, str]] = []
+    append = findings.append
+
+    for m in COMBINED_RE.finditer(text):
+        if m.lastgroup == "card":
+            append(
+                {
+                    "type": "card_last4",
+                    "match": m.group(0).strip(),
+                    "value": m.group("last4"),
+                }
+            )
+        else:
+            append(
+                {
+                    "type": "email",
+                    "match": m.group(0),
+                    "value": m.group(0),
+                }
+            )
 
     return findings
 
@@ -15,56 +15,157 @@ Notes:
 """
 
 import argparse
+import functools
+import hashlib
 import json
+import mmap
 import os
 import re
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from scanner import flatten_text, scan_for_sensitive
+
+# Validation asks about the same handful of paths several times in one run;
+# caching turns the repeat stat syscalls into dict hits. Cheap on local
+# disks, meaningful on the bind mounts and overlay filesystems containers
+# put these lessons on.
+_exists = functools.lru_cache(maxsize=256)(os.path.exists)
+
+# Same motif for basename: the recovery-log checks ask for the basename of
+# the same snapshot and quarantine paths repeatedly, and a future batch mode
+# over many outputs would amplify that. Pure string parsing, safe to cache.
+_basename = functools.lru_cache(maxsize=1024)(os.path.basename)
 
 # ---------------------------------------------------------------------------
 # Files + snapshots
 # ---------------------------------------------------------------------------
 def load_json(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def iter_jsonl(path: str) -> List[Dict[str, Any]]:
-    events: List[Dict[str, Any]] = []
-    if not os.path.exists(path):
-        return events
-    with open(path, "r", encoding="utf-8") as f:
+    # orjson parses bytes directly in native code; stdlib json is the
+    # fallback when it is not installed.
+    with open(path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _file_digest(path: str) -> bytes:
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        except ValueError:
+            # Empty files cannot be mapped; an empty digest is still a digest.
+            h.update(f.read())
+    return h.digest()
+
+
+def _files_identical(a: str, b: str) -> bool:
+    # Size check first: a mismatch settles it with two stat calls and no
+    # reads. Only equal-sized files pay for the mmap-backed hashing, which
+    # streams the pages through blake2b without copying them into Python.
+    try:
+        if os.path.getsize(a) != os.path.getsize(b):
+            return False
+    except OSError:
+        return False
+    return _file_digest(a) == _file_digest(b)
+
+
+# Parsed-log cache keyed on (mtime_ns, size): a CLI run pays nothing extra,
+# but a batch caller that validates many outputs against the same action log
+# decodes it once instead of once per output. The key changes whenever the
+# file is appended to or rewritten, which invalidates the entry naturally.
+_JSONL_CACHE: Dict[
+    Tuple[str, Optional[str]], Tuple[Tuple[int, int], Tuple[Dict[str, Any], ...]]
+] = {}
+
+
+def _read_jsonl(path: str, needle: Optional[bytes]) -> Iterator[Dict[str, Any]]:
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(path, "rb") as f:
         for line in f:
+            # A bytes substring probe is a memchr-style scan; lines that
+            # cannot possibly be interesting are skipped before any JSON
+            # decoding happens.
+            if needle is not None and needle not in line:
+                continue
             line = line.strip()
             if not line:
                 continue
             try:
-                events.append(json.loads(line))
-            except json.JSONDecodeError:
+                yield loads(line)
+            except ValueError:
                 continue
-    return events
+
+
+def iter_jsonl(path: str, contains: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream events one line at a time so large logs never have to be
+    materialized as a full list in memory. Repeat reads of an unchanged
+    file are served from the parsed-log cache. When `contains` is given,
+    only lines carrying that substring are decoded at all — callers that
+    want a single event type pay parse cost only for candidate lines.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    cache_key = (path, contains)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _JSONL_CACHE.get(cache_key)
+    if cached is not None and cached[0] == key:
+        yield from cached[1]
+        return
+    needle = contains.encode("utf-8") if contains is not None else None
+    events = tuple(_read_jsonl(path, needle))
+    _JSONL_CACHE[cache_key] = (key, events)
+    yield from events
 
 
 def most_recent_snapshot(snapshot_dir: str, output_filename: str) -> Optional[str]:
     if not os.path.isdir(snapshot_dir):
         return None
 
-    candidates: List[str] = []
-    for name in os.listdir(snapshot_dir):
-        if output_filename in name:
-            candidates.append(os.path.join(snapshot_dir, name))
+    # Prefer mtime for “most recent”. scandir returns DirEntry objects whose
+    # stat info is cached from the directory read, so this is one pass with
+    # no extra stat syscall per candidate, and max() replaces the full sort.
+    # Ties on mtime fall to the filename, whose embedded timestamp makes
+    # that a meaningful (and deterministic) order.
+    with os.scandir(snapshot_dir) as it:
+        candidates = [
+            (e.stat().st_mtime, e.path)
+            for e in it
+            if output_filename in e.name
+        ]
 
     if not candidates:
         return None
 
-    # Prefer mtime for “most recent”
-    candidates.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    return candidates[0]
+    return max(candidates)[1]
 
 # ---------------------------------------------------------------------------
 # Integrity checks
 # ---------------------------------------------------------------------------
+# Only the free-text fields can carry leaked content; paths, timestamps,
+# and the numeric budget cannot, so the scan never needs to traverse them.
+SENSITIVE_TEXT_FIELDS = ("summary", "key_needs")
+
+
+def extract_scan_text(obj: Dict[str, Any]) -> str:
+    return "\n".join(flatten_text(obj.get(f)) for f in SENSITIVE_TEXT_FIELDS)
+
+
+def _scan_findings(obj: Dict[str, Any]) -> List[Dict[str, str]]:
+    return scan_for_sensitive(extract_scan_text(obj))
+
+
 REQUIRED_TOP_LEVEL_FIELDS = [
     "input_file",
     "budget",
@@ -74,13 +175,20 @@ REQUIRED_TOP_LEVEL_FIELDS = [
     "created_at",
 ]
 
+# Frozen copy for the membership check: dict.keys() - frozenset runs as a
+# single C-level set difference instead of one interpreted lookup per field.
+REQUIRED_FIELDS_SET = frozenset(REQUIRED_TOP_LEVEL_FIELDS)
+
 
 def validate_schema(obj: Dict[str, Any]) -> List[str]:
     issues: List[str] = []
 
-    for field in REQUIRED_TOP_LEVEL_FIELDS:
-        if field not in obj:
-            issues.append(f"Missing required field: {field}")
+    missing = REQUIRED_FIELDS_SET - obj.keys()
+    if missing:
+        # Report in declaration order so the output stays deterministic.
+        for field in REQUIRED_TOP_LEVEL_FIELDS:
+            if field in missing:
+                issues.append(f"Missing required field: {field}")
 
     if "key_needs" in obj and not isinstance(obj["key_needs"], list):
         issues.append("Field key_needs must be a list.")
@@ -93,14 +201,21 @@ def validate_schema(obj: Dict[str, Any]) -> List[str]:
     return issues
 
 
+def _norm(p: str) -> str:
+    # Backslash separators only ever show up in Windows-written logs; on
+    # Linux/macOS the check is one C-level scan and the original string is
+    # returned untouched, so the common case allocates nothing.
+    return p.replace("\\", "/") if "\\" in p else p
+
+
 def validate_paths(obj: Dict[str, Any], expected_output_path: str) -> List[str]:
     issues: List[str] = []
 
     # output_file should match where we actually wrote
     out_file = obj.get("output_file")
     if isinstance(out_file, str):
-        out_norm = out_file.replace("\\", "/")
-        exp_norm = expected_output_path.replace("\\", "/")
+        out_norm = _norm(out_file)
+        exp_norm = _norm(expected_output_path)
         if not (out_norm == exp_norm or out_norm.endswith(exp_norm)):
             issues.append(f"output_file does not match expected path. output_file={out_file}")
     else:
@@ -109,48 +224,91 @@ def validate_paths(obj: Dict[str, Any], expected_output_path: str) -> List[str]:
     return issues
 
 
+def _tail_find_recovery(
+    path: str, output_path: str, chunk: int = 65536
+) -> Optional[Tuple[str, Any]]:
+    """
+    Read the action log backward in chunks and return (snapshot_path,
+    quarantined_path) from the newest recovery_performed event for
+    output_path. The log is append-only, so the event we want is almost
+    always within the last chunk; scanning from the tail turns
+    O(log size) I/O into one pread in the usual case.
+    """
+    if not _exists(path):
+        return None
+
+    output_norm = _norm(output_path)
+    # Cheap bytes probe computed once: a line cannot satisfy the endswith
+    # check below without mentioning the output's filename somewhere.
+    output_base_b = _basename(output_norm).encode("utf-8")
+    loads = orjson.loads if orjson is not None else json.loads
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        pos = os.fstat(fd).st_size
+        buf = b""
+        while pos > 0:
+            start = max(0, pos - chunk)
+            buf = os.pread(fd, pos - start, start) + buf
+            pos = start
+
+            lines = buf.split(b"\n")
+            # Unless we reached the file start, lines[0] may be a partial
+            # line; hold it back until the preceding chunk completes it.
+            begin = 0 if pos == 0 else 1
+            for line in reversed(lines[begin:]):
+                if b'"recovery_performed"' not in line or output_base_b not in line:
+                    continue
+                try:
+                    e = loads(line)
+                except ValueError:
+                    continue
+                if e.get("event_type") != "recovery_performed":
+                    continue
+                if _norm(str(e.get("output_path", ""))).endswith(output_norm):
+                    return (str(e.get("snapshot_path", "")), e.get("quarantined_path"))
+            buf = lines[0] if begin else b""
+    finally:
+        os.close(fd)
+
+    return None
+
+
 def validate_recovery_logged(
-    action_events: List[Dict[str, Any]],
+    action_log_path: str,
     output_path: str,
     snapshot_path: str,
     quarantine_dir: Optional[str],
 ) -> List[str]:
     issues: List[str] = []
 
-    # Find most recent recovery_performed event for this output_path
-    output_norm = output_path.replace("\\", "/")
-    candidates = [
-        e for e in action_events
-        if e.get("event_type") == "recovery_performed"
-        and str(e.get("output_path", "")).replace("\\", "/").endswith(output_norm)
-    ]
+    # Newest matching event by file position; the log is append-only, so
+    # that coincides with the max-ts candidate the old full scan selected.
+    best = _tail_find_recovery(action_log_path, output_path)
 
-    if not candidates:
+    if best is None:
         issues.append("No recovery_performed event found in action log for this output_path.")
         return issues
 
-    candidates.sort(key=lambda e: str(e.get("ts", "")), reverse=True)
-    evt = candidates[0]
-
     # Snapshot consistency (best-effort)
-    logged_snapshot = str(evt.get("snapshot_path", ""))
-    if snapshot_path and logged_snapshot and os.path.basename(snapshot_path) != os.path.basename(logged_snapshot):
+    logged_snapshot = best[0]
+    if snapshot_path and logged_snapshot and _basename(snapshot_path) != _basename(logged_snapshot):
         issues.append(
             "Most recent recovery_performed event used a different snapshot "
-            f"(logged={os.path.basename(logged_snapshot)} expected={os.path.basename(snapshot_path)})."
+            f"(logged={_basename(logged_snapshot)} expected={_basename(snapshot_path)})."
         )
 
     # Quarantine artifact should exist if a quarantine_dir is provided
-    quarantined_path = evt.get("quarantined_path")
+    quarantined_path = best[1]
     if quarantine_dir:
         if not quarantined_path:
             issues.append("Recovery event missing quarantined_path.")
         else:
             qp = str(quarantined_path)
-            if not os.path.exists(qp):
+            if not _exists(qp):
                 # If log stores a relative path, try joining
-                joined = os.path.join(quarantine_dir, os.path.basename(qp))
-                if not os.path.exists(joined):
+                joined = os.path.join(quarantine_dir, _basename(qp))
+                if not _exists(joined):
                     issues.append(f"Quarantined file not found: {qp}")
 
     return issues
@@ -184,17 +342,23 @@ def main() -> None:
 
     checks: Dict[str, Any] = {}
 
-    if not os.path.exists(output_path):
+    if not _exists(output_path):
         print("FAIL: output file does not exist:", output_path)
         raise SystemExit(2)
 
-    if not baseline_path or not os.path.exists(baseline_path):
+    if not baseline_path or not _exists(baseline_path):
         print("FAIL: baseline snapshot not found. Provide --baseline or ensure snapshots exist in:", args.snapshot)
         raise SystemExit(2)
 
+    # Byte-identity short-circuit: post-recovery the output is usually an
+    # exact copy of the restored snapshot. When the files hash the same,
+    # the baseline never needs parsing at all — parity holds by definition
+    # and one parse of the current output serves both roles.
+    identical = _files_identical(output_path, baseline_path)
+
     # Load current + baseline
     current_obj = load_json(output_path)
-    baseline_obj = load_json(baseline_path)
+    baseline_obj = current_obj if identical else load_json(baseline_path)
 
     # Schema/integrity checks
     schema_issues = validate_schema(current_obj)
@@ -203,18 +367,72 @@ def main() -> None:
     path_issues = validate_paths(current_obj, output_path)
     checks["paths"] = {"ok": len(path_issues) == 0, "issues": path_issues}
 
-    # Compare a small set of fields to confirm we’re back to known-good content
+    # Compare a small set of fields to confirm we’re back to known-good content.
+    # Fast path: serialize both field subsets to canonical orjson bytes and
+    # compare once in C, instead of dispatching Python-level deep equality
+    # per field. Only on mismatch (or without orjson) does the per-field
+    # pass run to name which fields changed.
     compare_fields = ["summary", "key_needs", "budget", "input_file", "output_file"]
+    if identical:
+        parity = True
+    else:
+        sub_current = {f: current_obj.get(f) for f in compare_fields}
+        sub_baseline = {f: baseline_obj.get(f) for f in compare_fields}
+        if orjson is not None:
+            try:
+                parity = orjson.dumps(sub_current, option=orjson.OPT_SORT_KEYS) == orjson.dumps(
+                    sub_baseline, option=orjson.OPT_SORT_KEYS
+                )
+            except TypeError:
+                parity = sub_current == sub_baseline
+        else:
+            parity = sub_current == sub_baseline
+
     diffs: List[str] = []
-    for f in compare_fields:
-        if current_obj.get(f) != baseline_obj.get(f):
-            diffs.append(f"Field differs from baseline: {f}")
+    if not parity:
+        # Name the fields that changed. Comparing canonical orjson bytes
+        # keeps even this per-field pass out of Python's recursive __eq__
+        # for list/dict values — bytes equality is a single memcmp.
+        for f in compare_fields:
+            c, b = sub_current[f], sub_baseline[f]
+            if orjson is not None:
+                try:
+                    differs = orjson.dumps(c, option=orjson.OPT_SORT_KEYS) != orjson.dumps(
+                        b, option=orjson.OPT_SORT_KEYS
+                    )
+                except TypeError:
+                    differs = c != b
+            else:
+                differs = c != b
+            if differs:
+                diffs.append(f"Field differs from baseline: {f}")
     checks["baseline_parity"] = {"ok": len(diffs) == 0, "differences": diffs, "baseline": baseline_path}
 
+    # Sensitive scan: the recovered output must not carry leaked content.
+    # When the compared fields are identical to a clean baseline, scanning
+    # the current object again cannot find anything new, so the hot regex
+    # pass over it is skipped entirely. When the fields already differ the
+    # baseline's cleanliness is irrelevant — only the current object needs
+    # scanning.
+    if diffs:
+        findings = _scan_findings(current_obj)
+        checks["sensitive_scan"] = {"ok": len(findings) == 0, "findings": findings}
+    else:
+        baseline_findings = _scan_findings(baseline_obj)
+        if not baseline_findings:
+            checks["sensitive_scan"] = {"ok": True, "findings": [], "skipped": "matches_baseline"}
+        else:
+            # Byte-identical files share one parsed object; reuse its scan.
+            findings = (
+                baseline_findings
+                if baseline_obj is current_obj
+                else _scan_findings(current_obj)
+            )
+            checks["sensitive_scan"] = {"ok": len(findings) == 0, "findings": findings}
+
     # Confirm recovery was logged
-    action_events = iter_jsonl(args.action_log)
     log_issues = validate_recovery_logged(
-        action_events=action_events,
+        action_log_path=args.action_log,
         output_path=output_path,
         snapshot_path=baseline_path,
         quarantine_dir=args.quarantine,